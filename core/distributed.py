@@ -0,0 +1,320 @@
+import argparse
+import ipaddress
+import itertools
+import multiprocessing
+import os
+import queue
+import random
+import threading
+import time
+import traceback
+from collections import deque
+from multiprocessing.connection import Client, Listener, wait
+
+from core.game_engine import GameEngine
+from core.tournament import Tournament
+
+
+# Hex-encoded shared secret read by workers (and coordinators) when none is given
+AUTHKEY_ENV = "PD_AUTHKEY"
+
+
+def _is_loopback(host):
+    if host == "localhost":
+        return True
+    try:
+        return ipaddress.ip_address(host).is_loopback
+    except ValueError:
+        return False
+
+
+def play_pairing(task):
+    """
+    Play one match on a worker. `task` is (bot_a, bot_b, rounds, noise_rate, seed,
+    compiled), where `compiled` maps bot class -> CompiledStrategy for the
+    two bots (or is None); returns (score_a, score_b, coop_rate_a, coop_rate_b).
+    """
+    bot_a, bot_b, rounds, noise_rate, seed, compiled = task
+    if seed is not None:
+        random.seed(seed)
+    score_a, score_b = GameEngine(noise_rate, compiled=compiled).play_match(bot_a, bot_b, rounds)
+    return (score_a, score_b,
+            getattr(bot_a, "last_coop_rate", 0),
+            getattr(bot_b, "last_coop_rate", 0))
+
+
+def run_worker(address, authkey):
+    """
+    Connect to a coordinator at `address` and process shards until told to stop.
+    Each shard is (job_id, shard_id, func, items); the worker replies with
+    ("ok", job_id, shard_id, [func(item) for item in items]) or
+    ("error", job_id, shard_id, traceback).
+    """
+    conn = Client(tuple(address), authkey=authkey)
+    try:
+        while True:
+            message = conn.recv()
+            if message is None:
+                break
+            job_id, shard_id, func, items = message
+            try:
+                reply = ("ok", job_id, shard_id, [func(item) for item in items])
+            except Exception:
+                reply = ("error", job_id, shard_id, traceback.format_exc())
+            conn.send(reply)
+    except (EOFError, OSError):
+        pass  # coordinator went away or dropped this worker
+    finally:
+        conn.close()
+
+
+class Coordinator:
+    """
+    Hands out shards of work to worker processes over a local socket and
+    reassembles the results in input order. Workers connect with
+    ``run_worker(coordinator.address)`` (or ``python -m core.distributed``
+    on another node); a worker that disconnects mid-shard, or does not
+    answer within `shard_timeout`, is dropped and its shard reassigned to
+    the remaining workers.
+    """
+
+    def __init__(self, address=("127.0.0.1", 0), authkey=None, worker_timeout=30.0,
+                 shard_timeout=600.0):
+        """
+        Parameters
+        ----------
+        address : (str, int)
+            Interface and port to listen on. Port 0 picks a free port.
+        authkey : bytes or None
+            Shared secret workers must present when connecting. Every message
+            is unpickled, so anyone holding the key can run code on both ends.
+            If None, the hex key in $PD_AUTHKEY is used, or else a random key
+            is generated (and printed when listening on a non-loopback address).
+        worker_timeout : float
+            Seconds to wait for a worker to connect when none are available.
+        shard_timeout : float
+            Seconds a worker may spend on one shard before it is considered
+            lost and the shard is handed to another worker.
+        """
+        if authkey is None and os.environ.get(AUTHKEY_ENV):
+            authkey = bytes.fromhex(os.environ[AUTHKEY_ENV])
+        generated = authkey is None
+        if generated:
+            authkey = os.urandom(16)
+        self.authkey = authkey
+        self.worker_timeout = worker_timeout
+        self.shard_timeout = shard_timeout
+        self._job_ids = itertools.count()
+        self.listener = Listener(address, authkey=authkey)
+        self.address = self.listener.address
+        if generated and not _is_loopback(self.address[0]):
+            print(f"[Coordinator] Workers connect with: python -m core.distributed "
+                  f"--connect HOST:{self.address[1]} --authkey {authkey.hex()}")
+        self.processes = []
+        self.workers = []
+        self._incoming = queue.Queue()
+        self._closed = False
+        threading.Thread(target=self._accept_loop, daemon=True).start()
+
+    def _accept_loop(self):
+        while not self._closed:
+            try:
+                conn = self.listener.accept()
+            except (OSError, EOFError, multiprocessing.AuthenticationError):
+                if self._closed:
+                    return
+                continue
+            self._incoming.put(conn)
+
+    def _collect_new_workers(self):
+        while True:
+            try:
+                self.workers.append(self._incoming.get_nowait())
+            except queue.Empty:
+                return
+
+    def spawn_workers(self, count):
+        """Start `count` worker processes on this machine."""
+        for _ in range(count):
+            process = multiprocessing.Process(target=run_worker, args=(self.address, self.authkey), daemon=True)
+            process.start()
+            self.processes.append(process)
+        return self.processes[-count:] if count else []
+
+    def map(self, func, items, shard_size=16, progress=None):
+        """
+        Apply `func` to every item on the workers and return the results in
+        the order of `items`. `func` must be importable by the workers
+        (a module-level function) and items must be picklable. If given,
+        `progress` is called with each shard's results as they arrive.
+        """
+        items = list(items)
+        results = [None] * len(items)
+        job_id = next(self._job_ids)
+        pending = deque(
+            (shard_id, start, items[start:start + shard_size])
+            for shard_id, start in enumerate(range(0, len(items), shard_size))
+        )
+        remaining = len(pending)
+        assigned = {}  # worker connection -> ((shard_id, start, shard items), time sent)
+        idle_since = time.monotonic()
+
+        while remaining:
+            self._collect_new_workers()
+
+            # Hand a shard to every idle worker
+            for conn in list(self.workers):
+                if not pending:
+                    break
+                if conn in assigned:
+                    continue
+                shard = pending.popleft()
+                assigned[conn] = (shard, time.monotonic())
+                try:
+                    conn.send((job_id, shard[0], func, shard[2]))
+                except OSError:
+                    self._drop_worker(conn, assigned, pending)
+
+            if not assigned:
+                if time.monotonic() - idle_since > self.worker_timeout:
+                    raise RuntimeError(f"No workers available to run {len(pending)} remaining shard(s).")
+                time.sleep(0.05)
+                continue
+            idle_since = time.monotonic()
+
+            for conn in wait(list(assigned), timeout=0.5):
+                try:
+                    status, reply_job, shard_id, payload = conn.recv()
+                except (EOFError, OSError):
+                    self._drop_worker(conn, assigned, pending)
+                    continue
+                (expected_id, start, _), _ = assigned[conn]
+                if reply_job != job_id or shard_id != expected_id:
+                    continue  # stale reply from an earlier map() call
+                del assigned[conn]
+                if status == "error":
+                    self._drain(assigned)
+                    raise RuntimeError(f"Shard {shard_id} failed on a worker:\n{payload}")
+                results[start:start + len(payload)] = payload
+                remaining -= 1
+                if progress is not None:
+                    progress(payload)
+
+            # Workers that hang or lose their link without closing it
+            now = time.monotonic()
+            for conn, (_, sent_at) in list(assigned.items()):
+                if now - sent_at > self.shard_timeout:
+                    self._drop_worker(conn, assigned, pending)
+
+        return results
+
+    def _drop_worker(self, conn, assigned, pending):
+        """Forget a dead worker and put its in-flight shard back on the queue."""
+        entry = assigned.pop(conn, None)
+        if entry is not None:
+            pending.appendleft(entry[0])
+        if conn in self.workers:
+            self.workers.remove(conn)
+        conn.close()
+
+    def _drain(self, assigned):
+        """Wait for (and discard) the replies of in-flight shards, dropping workers that time out."""
+        deadline = time.monotonic() + self.shard_timeout
+        while assigned:
+            ready = wait(list(assigned), timeout=max(0, deadline - time.monotonic()))
+            if not ready:
+                break
+            for conn in ready:
+                try:
+                    conn.recv()
+                except (EOFError, OSError):
+                    self._drop_worker(conn, assigned, deque())
+                    continue
+                del assigned[conn]
+        for conn in list(assigned):
+            self._drop_worker(conn, assigned, deque())
+
+    def close(self):
+        """Tell workers to stop, close the listener and join local worker processes."""
+        self._closed = True
+        self._collect_new_workers()
+        for conn in self.workers:
+            try:
+                conn.send(None)
+            except OSError:
+                pass
+            conn.close()
+        self.workers = []
+        self.listener.close()
+        for process in self.processes:
+            process.join(timeout=5)
+            if process.is_alive():
+                process.terminate()
+        self.processes = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class ShardedTournament(Tournament):
+    """
+    Tournament whose round-robin pairings are sharded across the workers of
+    a Coordinator. stats, results and match_history are rebuilt in the same
+    order as a local run. With `seed` set, each match is seeded from
+    (seed, generation, i, j), so results do not depend on which worker
+    played which shard. Compiled tables from `registry` are sent along with
+    each match so workers can use them too.
+    """
+
+    def __init__(self, bots, coordinator, noise_rate=0.03, metrics=None, shard_size=16, seed=None,
+                 registry=None):
+        super().__init__(bots, noise_rate=noise_rate, metrics=metrics, registry=registry)
+        self.coordinator = coordinator
+        self.shard_size = shard_size
+        self.seed = seed
+
+    def _tables_for(self, bot_a, bot_b):
+        """Compiled tables for the two bots' classes, or None if either has none."""
+        compiled = self.engine.compiled
+        if not compiled:
+            return None
+        class_a, class_b = type(bot_a), type(bot_b)
+        if class_a not in compiled or class_b not in compiled:
+            return None
+        return {class_a: compiled[class_a], class_b: compiled[class_b]}
+
+    def play_pairings(self, pairings, rounds_per_match=200, generation=1):
+        tasks = [
+            (self.bots[i], self.bots[j], rounds_per_match, self.noise_rate,
+             None if self.seed is None else f"{self.seed}:{generation}:{i}:{j}",
+             self._tables_for(self.bots[i], self.bots[j]))
+            for i, j in pairings
+        ]
+        progress = None
+        if self.metrics is not None:
+            # Count matches as shards come back so live snapshots show progress
+            def progress(shard_outcomes):
+                for _ in shard_outcomes:
+                    self.metrics.record_match(rounds_per_match)
+
+        return self.coordinator.map(play_pairing, tasks, self.shard_size, progress)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a tournament worker that connects to a coordinator.")
+    parser.add_argument("--connect", required=True, help="coordinator address as host:port")
+    parser.add_argument("--authkey", default=os.environ.get(AUTHKEY_ENV),
+                        help=f"hex shared secret printed by the coordinator (default: ${AUTHKEY_ENV})")
+    args = parser.parse_args()
+    if not args.authkey:
+        parser.error(f"an authkey is required (--authkey or ${AUTHKEY_ENV})")
+
+    host, port = args.connect.rsplit(":", 1)
+    run_worker((host, int(port)), bytes.fromhex(args.authkey))
+
+
+if __name__ == "__main__":
+    main()
@@ -10,7 +10,7 @@ class GameEngine:
     """
 
     # T>R>P>S defined in Details.md (5>3>1>0)
-    def __init__(self, noise_rate=0.03, T=5, R=3, P=1, S=0):
+    def __init__(self, noise_rate=0.03, T=5, R=3, P=1, S=0, metrics=None, compiled=None):
         """
         Parameters
         ----------
@@ -18,8 +18,16 @@ class GameEngine:
             Probability that a bot's move will be flipped (simulate noise).
         T, R, P, S : float
             Temptation, Reward, Punishment, and Sucker payoffs respectively.
+        metrics : MetricsRecorder or None
+            Optional recorder notified after every match.
+        compiled : dict or None
+            Optional map of bot class -> CompiledStrategy (see core.registry).
+            Matches where both bots have a table checked for at least
+            `rounds` rounds skip per-round method calls.
         """
         self.noise_rate = noise_rate
+        self.metrics = metrics
+        self.compiled = compiled
 
         # Balanced payoff matrix
         self.PAYOFFS = {
@@ -28,6 +36,8 @@ class GameEngine:
             (Move.DEFECT, Move.COOPERATE):    (T, S),
             (Move.DEFECT, Move.DEFECT):       (P, P),
         }
+        # Same payoffs indexed by (move_a << 1) | move_b, with C=0 and D=1
+        self.payoff_codes = [(R, R), (S, T), (T, S), (P, P)]
 
     def maybe_flip(self, move):
         """Simulate execution error with probability `noise_rate`."""
@@ -51,27 +61,88 @@ class GameEngine:
         # Optional tracking for analytics (cooperation ratio)
         coop_count_a = coop_count_b = 0
 
-        for r in range(rounds):
-            state_a = GameState(bot_a.self_history, bot_a.opponent_history, r)
-            state_b = GameState(bot_b.self_history, bot_b.opponent_history, r)
+        strategy_a = strategy_b = None
+        if self.compiled:
+            strategy_a = self.compiled.get(type(bot_a))
+            strategy_b = self.compiled.get(type(bot_b))
 
-            move_a = self.maybe_flip(bot_a.get_move(state_a))
-            move_b = self.maybe_flip(bot_b.get_move(state_b))
+        if (strategy_a is not None and strategy_b is not None
+                and rounds <= strategy_a.horizon and rounds <= strategy_b.horizon
+                and strategy_a.matches(bot_a) and strategy_b.matches(bot_b)):
+            score_a, score_b, rounds_played = self.play_tables(strategy_a, strategy_b, rounds)
+            # Rebuild the histories the per-round path would have recorded
+            moves = (Move.COOPERATE, Move.DEFECT)
+            bot_a.self_history = [moves[code >> 1] for code in rounds_played]
+            bot_a.opponent_history = [moves[code & 1] for code in rounds_played]
+            bot_b.self_history = list(bot_a.opponent_history)
+            bot_b.opponent_history = list(bot_a.self_history)
+            coop_count_a = bot_a.self_history.count(Move.COOPERATE)
+            coop_count_b = bot_b.self_history.count(Move.COOPERATE)
+        else:
+            for r in range(rounds):
+                state_a = GameState(bot_a.self_history, bot_a.opponent_history, r)
+                state_b = GameState(bot_b.self_history, bot_b.opponent_history, r)
 
-            payoff_a, payoff_b = self.PAYOFFS[(move_a, move_b)]
-            score_a += payoff_a
-            score_b += payoff_b
+                move_a = self.maybe_flip(bot_a.get_move(state_a))
+                move_b = self.maybe_flip(bot_b.get_move(state_b))
 
-            if move_a == Move.COOPERATE:
-                coop_count_a += 1
-            if move_b == Move.COOPERATE:
-                coop_count_b += 1
+                payoff_a, payoff_b = self.PAYOFFS[(move_a, move_b)]
+                score_a += payoff_a
+                score_b += payoff_b
 
-            bot_a.record_result(move_a, move_b)
-            bot_b.record_result(move_b, move_a)
+                if move_a == Move.COOPERATE:
+                    coop_count_a += 1
+                if move_b == Move.COOPERATE:
+                    coop_count_b += 1
+
+                bot_a.record_result(move_a, move_b)
+                bot_b.record_result(move_b, move_a)
 
         # Store stats for analysis
         bot_a.last_coop_rate = coop_count_a / rounds
         bot_b.last_coop_rate = coop_count_b / rounds
 
-        return score_a, score_b
\ No newline at end of file
+        if self.metrics is not None:
+            self.metrics.record_match(rounds)
+
+        return score_a, score_b
+
+    def play_tables(self, strategy_a, strategy_b, rounds=200):
+        """
+        Play a match between two compiled strategies using table lookups only.
+        Noise is drawn in the same order as play_match.
+
+        Returns
+        -------
+        (float, float, list) : scores for a and b, and each round played
+        encoded as (move_a << 1) | move_b with C=0 and D=1.
+        """
+        rand = random.random
+        noise = self.noise_rate
+        payoffs = self.payoff_codes
+        tables_a, depth_a, mask_a = strategy_a.tables, strategy_a.depth, (1 << 2 * strategy_a.depth) - 1
+        tables_b, depth_b, mask_b = strategy_b.tables, strategy_b.depth, (1 << 2 * strategy_b.depth) - 1
+
+        score_a = score_b = 0
+        key_a = key_b = 0
+        rounds_played = []
+        record = rounds_played.append
+
+        for r in range(rounds):
+            move_a = tables_a[r if r < depth_a else depth_a][key_a]
+            move_b = tables_b[r if r < depth_b else depth_b][key_b]
+            if rand() < noise:
+                move_a ^= 1
+            if rand() < noise:
+                move_b ^= 1
+
+            code = (move_a << 1) | move_b
+            payoff_a, payoff_b = payoffs[code]
+            score_a += payoff_a
+            score_b += payoff_b
+            record(code)
+
+            key_a = ((key_a << 2) | code) & mask_a
+            key_b = ((key_b << 2) | (move_b << 1) | move_a) & mask_b
+
+        return score_a, score_b, rounds_played
\ No newline at end of file
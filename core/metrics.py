@@ -0,0 +1,207 @@
+import os
+import sys
+import threading
+import time
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def current_rss_bytes():
+    """Return the resident set size of this process in bytes (0 if unknown)."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        pass
+    try:
+        import resource
+    except ImportError:
+        return 0
+    # ru_maxrss is the peak, reported in KiB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class MetricsRecorder:
+    """
+    Live instrumentation for long tournaments. Counts matches and rounds,
+    times each generation, tracks population composition and RSS, and
+    emits a Prometheus-style text snapshot at a fixed interval from a
+    background thread, so snapshots keep coming during long matches.
+    Throughput gauges cover the window since the previous snapshot.
+
+    Attach it with ``Tournament(bots, metrics=MetricsRecorder(...))``.
+    When no recorder is attached, the engine and tournament only pay for
+    an ``is None`` check per match.
+    """
+
+    def __init__(self, path="./data/metrics.prom", interval=5.0, port=None, host="127.0.0.1"):
+        """
+        Parameters
+        ----------
+        path : str or None
+            File the text snapshot is written to (atomically replaced).
+        interval : float or None
+            Seconds between two snapshots emitted by the background thread.
+            None disables the thread; snapshots are then only written at the
+            end of each generation and on ``emit()``.
+        port : int or None
+            If given, serve the latest snapshot over HTTP on ``host:port``.
+            Use port 0 to pick a free port (see ``self.port``).
+        host : str
+            Interface the HTTP endpoint binds to.
+        """
+        self.path = path
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._reset_counters()
+
+        self.generation = 0
+        self.total_generations = None
+        self.generation_times = []
+        self.population = Counter()
+        self._gen_started_at = None
+        self._snapshot = ""
+
+        self._server = None
+        self.port = None
+        if port is not None:
+            self.serve(port, host)
+
+        self._stop = threading.Event()
+        self._ticker = None
+        if interval:
+            self._ticker = threading.Thread(target=self._tick, daemon=True)
+            self._ticker.start()
+
+    def _reset_counters(self):
+        self.started_at = time.monotonic()
+        self.matches = 0
+        self.rounds = 0
+        # Counts at the previous snapshot, for windowed throughput
+        self._window = (self.started_at, 0, 0)
+
+    def _tick(self):
+        while not self._stop.wait(self.interval):
+            self.emit()
+
+    # --- Hooks called by Tournament / GameEngine ---
+
+    def start_run(self, total_generations=None):
+        """Mark the start of an evolution run of `total_generations` and reset all counters."""
+        self._reset_counters()
+        self.total_generations = total_generations
+        self.generation_times = []
+
+    def start_generation(self, generation, bots):
+        """Record the population entering `generation`."""
+        self.generation = generation
+        self.population = Counter(bot.__class__.__name__ for bot in bots)
+        self._gen_started_at = time.monotonic()
+
+    def end_generation(self, generation):
+        """Record the wall time of `generation` and force a snapshot."""
+        if self._gen_started_at is not None:
+            self.generation_times.append(time.monotonic() - self._gen_started_at)
+            self._gen_started_at = None
+        self.emit()
+
+    def record_match(self, rounds):
+        """Count one finished match of `rounds` rounds."""
+        self.matches += 1
+        self.rounds += rounds
+
+    # --- Derived values ---
+
+    def eta_seconds(self):
+        """Estimated seconds left in the run, or None if unknown."""
+        if not self.total_generations or not self.generation_times:
+            return None
+        remaining = max(0, self.total_generations - len(self.generation_times))
+        return remaining * sum(self.generation_times) / len(self.generation_times)
+
+    def render(self):
+        """Return the current metrics in Prometheus text exposition format."""
+        window_start, window_matches, window_rounds = self._window
+        elapsed = max(time.monotonic() - window_start, 1e-9)
+        lines = [
+            "# TYPE pd_matches_total counter",
+            f"pd_matches_total {self.matches}",
+            "# TYPE pd_rounds_total counter",
+            f"pd_rounds_total {self.rounds}",
+            "# TYPE pd_matches_per_second gauge",
+            f"pd_matches_per_second {(self.matches - window_matches) / elapsed:.3f}",
+            "# TYPE pd_rounds_per_second gauge",
+            f"pd_rounds_per_second {(self.rounds - window_rounds) / elapsed:.3f}",
+            "# TYPE pd_generation gauge",
+            f"pd_generation {self.generation}",
+        ]
+        if self.generation_times:
+            lines += [
+                "# TYPE pd_generation_seconds gauge",
+                f"pd_generation_seconds {self.generation_times[-1]:.6f}",
+            ]
+        eta = self.eta_seconds()
+        if eta is not None:
+            lines += [
+                "# TYPE pd_eta_seconds gauge",
+                f"pd_eta_seconds {eta:.3f}",
+            ]
+        lines.append("# TYPE pd_population gauge")
+        for name, count in sorted(self.population.items()):
+            lines.append(f'pd_population{{bot="{name}"}} {count}')
+        lines += [
+            "# TYPE pd_rss_bytes gauge",
+            f"pd_rss_bytes {current_rss_bytes()}",
+        ]
+        return "\n".join(lines) + "\n"
+
+    # --- Output ---
+
+    def emit(self):
+        """Refresh the snapshot, start a new throughput window and write it to `path` if one is set."""
+        with self._lock:
+            matches, rounds = self.matches, self.rounds
+            self._snapshot = self.render()
+            self._window = (time.monotonic(), matches, rounds)
+            if self.path:
+                directory = os.path.dirname(self.path)
+                if directory:
+                    os.makedirs(directory, exist_ok=True)
+                tmp_path = self.path + ".tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(self._snapshot)
+                os.replace(tmp_path, self.path)
+            return self._snapshot
+
+    def serve(self, port=9108, host="127.0.0.1"):
+        """Serve the latest snapshot at http://host:port/metrics in a daemon thread."""
+        recorder = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                body = (recorder._snapshot or recorder.render()).encode()
+                self.send_response(200)
+                self.send_header("Content-Type", "text/plain; version=0.0.4")
+                self.send_header("Content-Length", str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        self._server = ThreadingHTTPServer((host, port), Handler)
+        self.port = self._server.server_address[1]
+        threading.Thread(target=self._server.serve_forever, daemon=True).start()
+
+    def close(self):
+        """Stop the background thread, write a final snapshot and stop the HTTP endpoint, if any."""
+        self._stop.set()
+        if self._ticker is not None:
+            self._ticker.join()
+            self._ticker = None
+        self.emit()
+        if self._server is not None:
+            self._server.shutdown()
+            self._server.server_close()
+            self._server = None
@@ -0,0 +1,392 @@
+import ast
+import copy
+import hashlib
+import importlib
+import importlib.util
+import itertools
+import json
+import os
+import random
+import sys
+from collections.abc import Mapping
+
+from core.game_state import GameState
+from bots.base import Move
+
+# Moves are encoded as 0 (cooperate) / 1 (defect) inside compiled tables
+MOVE_CODES = {Move.COOPERATE: 0, Move.DEFECT: 1}
+CODE_MOVES = (Move.COOPERATE, Move.DEFECT)
+
+# Bump when the probing or table format changes, to invalidate cached tables
+REGISTRY_VERSION = 2
+
+# Shared code every bot runs against; cached tables are tied to these files too
+SHARED_SOURCES = (sys.modules[Move.__module__].__file__, sys.modules[GameState.__module__].__file__)
+
+
+class CompiledStrategy:
+    """
+    Lookup-table form of a deterministic bot whose move depends only on the
+    last `depth` rounds. Each round is encoded as (own << 1) | opponent, and
+    the last rounds are packed two bits each, most recent lowest.
+
+    tables[r] for r < depth holds the opening moves for round r (keyed by the
+    full history so far); tables[depth] holds the move for every later round
+    (keyed by the last `depth` rounds). The table was only checked for
+    matches of up to `horizon` rounds; longer matches must not use it.
+    """
+
+    def __init__(self, depth, tables, horizon, snapshot=None):
+        self.depth = depth
+        self.tables = tables
+        self.horizon = horizon
+        self.snapshot = snapshot
+
+    def matches(self, bot):
+        """True if `bot` (freshly reset) is in the state the table was compiled from."""
+        if self.snapshot is None:
+            return True
+        state = vars(bot)
+        return all(key in state and state[key] == value for key, value in self.snapshot.items())
+
+    def to_dict(self):
+        return {"depth": self.depth, "tables": self.tables, "horizon": self.horizon}
+
+    @classmethod
+    def from_dict(cls, data, snapshot=None):
+        return cls(data["depth"], data["tables"], data["horizon"], snapshot)
+
+
+def _encode(history):
+    key = 0
+    for own, opp in history:
+        key = (key << 2) | (own << 1) | opp
+    return key
+
+
+def _replay(bot, history):
+    """
+    Replay `history` of (own, opp) codes through `bot` and return the move code
+    it chose at every round, including the one after the last (len(history) + 1 moves).
+    """
+    bot.reset()
+    self_history, opponent_history = [], []
+    chosen = []
+    for r, (own, opp) in enumerate(history):
+        chosen.append(MOVE_CODES[bot.get_move(GameState(self_history, opponent_history, r))])
+        self_history.append(CODE_MOVES[own])
+        opponent_history.append(CODE_MOVES[opp])
+        bot.record_result(CODE_MOVES[own], CODE_MOVES[opp])
+    chosen.append(MOVE_CODES[bot.get_move(GameState(self_history, opponent_history, len(history)))])
+    return chosen
+
+
+def _probe(bot, history):
+    """Replay `history` through `bot` and return its next move code."""
+    return _replay(bot, history)[-1]
+
+
+def analyze_bot(bot_class, max_depth=3, samples=8, horizon=1000):
+    """
+    Probe a bot class and return (metadata, CompiledStrategy or None).
+
+    The bot is played through every history up to max_depth + 2 rounds under
+    two different random seeds. It counts as deterministic if both runs agree,
+    and as memory-d for the smallest d where the move depends only on the last
+    d rounds. The resulting table is then checked at every round of
+    `horizon`-round histories (all-C, all-D, alternating and `samples` random
+    ones), which rejects bots that look at the round number. The global
+    random state is restored afterwards.
+    """
+    metadata = {"deterministic": False, "memory_depth": None}
+    try:
+        bot = bot_class()
+    except TypeError as e:
+        print(f"[Registry] Not compiling {bot_class.__name__}: constructor needs arguments ({e}).")
+        return metadata, None
+
+    rng_state = random.getstate()
+    try:
+        pairs = list(itertools.product((0, 1), repeat=2))
+        histories = [h for length in range(max_depth + 3) for h in itertools.product(pairs, repeat=length)]
+
+        random.seed(1)
+        moves = {h: _probe(bot, h) for h in histories}
+        random.seed(2)
+        metadata["deterministic"] = all(_probe(bot, h) == moves[h] for h in histories)
+        if not metadata["deterministic"]:
+            return metadata, None
+
+        for depth in range(max_depth + 1):
+            tables = [[None] * (4 ** r) for r in range(depth + 1)]
+            consistent = True
+            for h, move in moves.items():
+                r = min(len(h), depth)
+                key = _encode(h[len(h) - r:])
+                if tables[r][key] is None:
+                    tables[r][key] = move
+                elif tables[r][key] != move:
+                    consistent = False
+                    break
+            if consistent and all(None not in table for table in tables):
+                break
+        else:
+            return metadata, None
+
+        strategy = CompiledStrategy(depth, tables, horizon)
+        sampler = random.Random(0)
+        checks = [((0, 0),) * horizon, ((1, 1),) * horizon, ((0, 1), (1, 0)) * (horizon // 2)]
+        checks += [tuple(sampler.choice(pairs) for _ in range(horizon)) for _ in range(samples)]
+        mask = (1 << 2 * depth) - 1
+        for h in checks:
+            key = 0
+            for r, move in enumerate(_replay(bot, h[:horizon - 1])):
+                if move != tables[min(r, depth)][key]:
+                    return metadata, None
+                if r < len(h):
+                    key = ((key << 2) | (h[r][0] << 1) | h[r][1]) & mask
+
+        metadata["memory_depth"] = depth
+        bot.reset()
+        strategy.snapshot = copy.deepcopy(vars(bot))
+        return metadata, strategy
+    except Exception as e:
+        print(f"[Registry] Not compiling {bot_class.__name__}: probing raised {type(e).__name__}: {e}")
+        return metadata, None
+    finally:
+        random.setstate(rng_state)
+
+
+def _parse_classes(source):
+    """
+    Return (name, base names, external base names) for each top-level class in
+    `source`. External bases are those imported from non-standard-library modules.
+    """
+    tree = ast.parse(source)
+    imported = {}  # local name -> top-level module it was imported from
+    for node in tree.body:
+        if isinstance(node, ast.ImportFrom):
+            module = (node.module or "").split(".")[0] if node.level == 0 else ""
+            for alias in node.names:
+                imported[alias.asname or alias.name] = module
+
+    classes = []
+    for node in tree.body:
+        if not isinstance(node, ast.ClassDef):
+            continue
+        bases = [base.id if isinstance(base, ast.Name) else getattr(base, "attr", None) for base in node.bases]
+        bases = [base for base in bases if base]
+        external = [base for base in bases
+                    if base in imported and imported[base] not in sys.stdlib_module_names]
+        classes.append((node.name, bases, external))
+    return classes
+
+
+class BotRegistry(Mapping):
+    """
+    Discovers bot classes in a submissions directory without importing them,
+    and imports each module only when one of its bots is first requested.
+
+    Behaves as a read-only mapping of bot name -> bot class, so it can be
+    used directly as ``Tournament.bot_class_map``. Metadata (memory depth,
+    determinism) and compiled lookup tables are cached in memory and
+    optionally in a JSON file at `cache_path`, keyed on the hash of the bot's
+    file, bots/base.py, core/game_state.py, `max_depth`, `horizon` and
+    REGISTRY_VERSION.
+    Delete the cache if a bot depends on other shared helpers that change.
+    """
+
+    def __init__(self, directory="bots", package=None, cache_path=None, compile_bots=True, max_depth=3,
+                 horizon=1000):
+        """
+        Parameters
+        ----------
+        directory : str
+            Folder containing one or more bot modules.
+        package : str or None
+            Import modules as ``package.<module>``; the directory's parent
+            must be on sys.path. This is needed for bots to be picklable by
+            core.distributed and for submissions that import each other
+            (``from package.other import OtherBot``). If None, modules are
+            loaded straight from their files under private module names, so
+            they cannot import one another.
+        cache_path : str or None
+            JSON file in which metadata and compiled tables are kept between runs.
+        compile_bots : bool
+            Compile qualifying bots into lookup tables when loaded.
+        max_depth : int
+            Largest memory depth considered for compilation.
+        horizon : int
+            Longest match (in rounds) a compiled table is checked for. Longer
+            matches fall back to calling the bot every round.
+        """
+        self.directory = directory
+        self.package = package
+        self.cache_path = cache_path
+        self.compile_bots = compile_bots
+        self.max_depth = max_depth
+        self.horizon = horizon
+
+        self.sources = {}   # bot name -> module file path
+        self.classes = {}   # bot name -> loaded class
+        self.compiled = {}  # bot class -> CompiledStrategy, shared with GameEngine
+        self._hashes = {}
+        self._cache = self._read_cache()
+        self._shared_key = self._compute_shared_key()
+        self.scan()
+
+    # --- Discovery and loading ---
+
+    def scan(self):
+        """
+        Find bot classes in `directory`. Safe to call again to pick up new files.
+        A class is a bot if it derives from BaseBot or from another bot defined
+        anywhere in the directory.
+        """
+        parsed = []  # (path, class name, base names, external base names)
+        for filename in sorted(os.listdir(self.directory)):
+            if not filename.endswith(".py") or filename.startswith("_"):
+                continue
+            path = os.path.join(self.directory, filename)
+            with open(path, "rb") as f:
+                source = f.read()
+            self._hashes[path] = hashlib.sha256(source).hexdigest()
+            try:
+                parsed.extend((path,) + cls for cls in _parse_classes(source))
+            except SyntaxError as e:
+                print(f"[Registry] Skipping {path}: {e}")
+
+        # Resolve bases across files until no new bots are found
+        bot_names = {"BaseBot"}
+        found = True
+        while found:
+            found = False
+            for path, name, bases, _ in parsed:
+                if name not in bot_names and any(base in bot_names for base in bases):
+                    bot_names.add(name)
+                    found = True
+
+        bot_names.discard("BaseBot")
+        for path, name, bases, external in parsed:
+            if name not in bot_names:
+                if external:
+                    print(f"[Registry] Skipping class {name} in {path}: base {', '.join(external)} "
+                          f"is not a bot in {self.directory}.")
+                continue
+            if name in self.sources and self.sources[name] != path:
+                print(f"[Registry] Duplicate bot name {name} in {path}; keeping {self.sources[name]}.")
+                continue
+            self.sources[name] = path
+        return list(self.sources)
+
+    def _import(self, path):
+        stem = os.path.splitext(os.path.basename(path))[0]
+        if self.package:
+            return importlib.import_module(f"{self.package}.{stem}")
+        module_name = f"_pd_submission_{stem}"
+        if module_name in sys.modules:
+            return sys.modules[module_name]
+        spec = importlib.util.spec_from_file_location(module_name, path)
+        module = importlib.util.module_from_spec(spec)
+        sys.modules[module_name] = module
+        spec.loader.exec_module(module)
+        return module
+
+    def load(self, name):
+        """Import (once) and return the bot class called `name`."""
+        if name in self.classes:
+            return self.classes[name]
+        path = self.sources[name]
+        bot_class = getattr(self._import(path), name)
+        self.classes[name] = bot_class
+        if self.compile_bots:
+            self._compile(name, bot_class)
+        return bot_class
+
+    def create(self, names=None):
+        """Instantiate one bot per name (default: every discovered bot)."""
+        return [self[name]() for name in (names if names is not None else self.sources)]
+
+    # --- Metadata and compilation ---
+
+    def _compute_shared_key(self):
+        """Hash of everything besides the bot's own file that a cached table depends on."""
+        digest = hashlib.sha256(f"v{REGISTRY_VERSION}:depth{self.max_depth}:horizon{self.horizon}".encode())
+        for path in SHARED_SOURCES:
+            with open(path, "rb") as f:
+                digest.update(f.read())
+        return digest.hexdigest()
+
+    def _cache_entry(self, name):
+        entry = self._cache.get(name)
+        if (entry and entry.get("sha256") == self._hashes[self.sources[name]]
+                and entry.get("shared") == self._shared_key):
+            return entry
+        return None
+
+    def metadata(self, name):
+        """Return {"deterministic", "memory_depth"} for `name`, importing only on a cache miss."""
+        entry = self._cache_entry(name)
+        if entry is None:
+            bot_class = self.load(name)
+            entry = self._cache_entry(name)
+            if entry is None:
+                self._analyze(name, bot_class)
+                entry = self._cache[name]
+        return {"deterministic": entry["deterministic"], "memory_depth": entry["memory_depth"]}
+
+    def _analyze(self, name, bot_class):
+        metadata, strategy = analyze_bot(bot_class, self.max_depth, horizon=self.horizon)
+        self._cache[name] = dict(metadata,
+                                 sha256=self._hashes[self.sources[name]],
+                                 shared=self._shared_key,
+                                 compiled=strategy.to_dict() if strategy else None)
+        self._write_cache()
+        return strategy
+
+    def _compile(self, name, bot_class):
+        entry = self._cache_entry(name)
+        if entry is None:
+            strategy = self._analyze(name, bot_class)
+        elif entry["compiled"] is None:
+            strategy = None
+        else:
+            bot = bot_class()
+            bot.reset()
+            strategy = CompiledStrategy.from_dict(entry["compiled"], copy.deepcopy(vars(bot)))
+        if strategy is not None:
+            self.compiled[bot_class] = strategy
+
+    def _read_cache(self):
+        if not self.cache_path or not os.path.exists(self.cache_path):
+            return {}
+        try:
+            with open(self.cache_path) as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def _write_cache(self):
+        if not self.cache_path:
+            return
+        directory = os.path.dirname(self.cache_path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        with open(self.cache_path, "w") as f:
+            json.dump(self._cache, f, indent=1)
+
+    # --- Mapping interface ---
+
+    def __getitem__(self, name):
+        if name not in self.sources:
+            raise KeyError(name)
+        return self.load(name)
+
+    def __contains__(self, name):
+        return name in self.sources  # without importing, unlike Mapping's default
+
+    def __iter__(self):
+        return iter(self.sources)
+
+    def __len__(self):
+        return len(self.sources)
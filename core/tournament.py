@@ -11,15 +11,28 @@ class Tournament:
     Tracks detailed stats and supports comprehensive historical export.
     """
 
-    def __init__(self, bots, noise_rate=0.03):
+    def __init__(self, bots=None, noise_rate=0.03, metrics=None, registry=None):
+        use_registry_map = bots is None
+        if bots is None:
+            if registry is None:
+                raise ValueError("Tournament needs either bots or a registry.")
+            bots = registry.create()  # one of every discovered bot
         self.original_bots = bots  # initial population
         self.bots = list(bots)
         self.noise_rate = noise_rate
-        self.engine = GameEngine(noise_rate)
+        self.metrics = metrics  # optional core.metrics.MetricsRecorder
+        self.registry = registry  # optional core.registry.BotRegistry
+        self.engine = GameEngine(noise_rate, metrics=metrics,
+                                 compiled=registry.compiled if registry is not None else None)
 
         # self.results is temporary per run, self.stats is per run
         self.stats = {}
-        self.bot_class_map = {bot.__class__.__name__: bot.__class__ for bot in self.original_bots}
+        # Without explicit bots, evolution draws from every discovered bot class;
+        # otherwise the registry only supplies compiled tables
+        if use_registry_map:
+            self.bot_class_map = registry
+        else:
+            self.bot_class_map = {bot.__class__.__name__: bot.__class__ for bot in self.original_bots}
 
         # NEW: History lists for comprehensive export
         self.leaderboard_history = []
@@ -36,57 +49,79 @@ class Tournament:
             "coop_rate": []
         } for bot in self.bots}
 
-        for i, bot_a in enumerate(self.bots):
-            for j, bot_b in enumerate(self.bots):
-                if i >= j:
-                    continue
-                score_a, score_b = self.engine.play_match(bot_a, bot_b, rounds_per_match)
-                name_a = bot_a.__class__.__name__
-                name_b = bot_b.__class__.__name__
-
-                # Determine match winner for historical tracking
-                winner = "Draw"
-                if abs(score_a - score_b) > 1e-6:
-                    winner = name_a if score_a > score_b else name_b
-
-                # Populate self.results (for run_evolution to use)
-                self.results[(name_a, name_b)] = (score_a, score_b)
-
-                # NEW: Populate match history
-                self.match_history.append({
-                    "Generation": generation,
-                    "Bot A": name_a,
-                    "Bot B": name_b,
-                    "Score A": score_a,
-                    "Score B": score_b,
-                    "Winner": winner
-                })
+        if self.metrics is not None:
+            self.metrics.start_generation(generation, self.bots)
+
+        n = len(self.bots)
+        pairings = [(i, j) for i in range(n) for j in range(i + 1, n)]
+        outcomes = self.play_pairings(pairings, rounds_per_match, generation)
+
+        for (i, j), (score_a, score_b, coop_a, coop_b) in zip(pairings, outcomes):
+            bot_a, bot_b = self.bots[i], self.bots[j]
+            name_a = bot_a.__class__.__name__
+            name_b = bot_b.__class__.__name__
+
+            # Determine match winner for historical tracking
+            winner = "Draw"
+            if abs(score_a - score_b) > 1e-6:
+                winner = name_a if score_a > score_b else name_b
+
+            # Populate self.results (for run_evolution to use)
+            self.results[(name_a, name_b)] = (score_a, score_b)
+
+            # NEW: Populate match history
+            self.match_history.append({
+                "Generation": generation,
+                "Bot A": name_a,
+                "Bot B": name_b,
+                "Score A": score_a,
+                "Score B": score_b,
+                "Winner": winner
+            })
 
-                # Update total scores
-                self.stats[name_a]["total_score"] += score_a
-                self.stats[name_b]["total_score"] += score_b
-
-                # Track cooperation rate
-                self.stats[name_a]["coop_rate"].append(getattr(bot_a, "last_coop_rate", 0))
-                self.stats[name_b]["coop_rate"].append(getattr(bot_b, "last_coop_rate", 0))
-
-                # Win/loss/draw
-                if winner == "Draw":
-                    self.stats[name_a]["draws"] += 1
-                    self.stats[name_b]["draws"] += 1
-                elif winner == name_a:
-                    self.stats[name_a]["wins"] += 1
-                    self.stats[name_b]["losses"] += 1
-                else:
-                    self.stats[name_b]["wins"] += 1
-                    self.stats[name_a]["losses"] += 1
+            # Update total scores
+            self.stats[name_a]["total_score"] += score_a
+            self.stats[name_b]["total_score"] += score_b
+
+            # Track cooperation rate
+            self.stats[name_a]["coop_rate"].append(coop_a)
+            self.stats[name_b]["coop_rate"].append(coop_b)
+
+            # Win/loss/draw
+            if winner == "Draw":
+                self.stats[name_a]["draws"] += 1
+                self.stats[name_b]["draws"] += 1
+            elif winner == name_a:
+                self.stats[name_a]["wins"] += 1
+                self.stats[name_b]["losses"] += 1
+            else:
+                self.stats[name_b]["wins"] += 1
+                self.stats[name_a]["losses"] += 1
 
         # Compute average cooperation rate
         for name, s in self.stats.items():
             s["coop_rate"] = mean(s["coop_rate"]) if s["coop_rate"] else 0
 
+        if self.metrics is not None:
+            self.metrics.end_generation(generation)
+
         return self.stats
 
+    def play_pairings(self, pairings, rounds_per_match=200, generation=1):
+        """
+        Play each (i, j) pairing of self.bots and return one
+        (score_a, score_b, coop_rate_a, coop_rate_b) tuple per pairing, in order.
+        Subclasses override this to run matches elsewhere (see core.distributed).
+        """
+        outcomes = []
+        for i, j in pairings:
+            bot_a, bot_b = self.bots[i], self.bots[j]
+            score_a, score_b = self.engine.play_match(bot_a, bot_b, rounds_per_match)
+            outcomes.append((score_a, score_b,
+                             getattr(bot_a, "last_coop_rate", 0),
+                             getattr(bot_b, "last_coop_rate", 0)))
+        return outcomes
+
     def leaderboard(self, sort_by="score"):
         """Return leaderboard sorted by score, wins, or cooperation rate."""
         if sort_by == "wins":
@@ -156,6 +191,9 @@ class Tournament:
 
         allowed_bot_names = set(bot_names)
 
+        if self.metrics is not None:
+            self.metrics.start_run(generations)
+
         for gen in range(generations):
             current_gen = gen + 1
             print(f"\n=== Generation {current_gen} ===")
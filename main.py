@@ -1,27 +1,14 @@
 from core.tournament import Tournament
-from bots.tit_for_tat import TitForTat
-from bots.random_bot import RandomBot
-from bots.always_cooperate import AlwaysCooperate
-from bots.always_defect import AlwaysDefect
-from bots.generous_tit_for_tat import GenerousTitForTat
-from bots.pavlov_bot import PavlovBot
-from bots.adaptive_random import AdaptiveRandom
+from core.registry import BotRegistry
 from core.util import plot_bar_race
 import matplotlib.pyplot as plt
 from core.util import draw_leaderboard
 
 def main():
-    bots = [
-        TitForTat(),
-        GenerousTitForTat(),
-        PavlovBot(),
-        AdaptiveRandom(),
-        RandomBot(),
-        AlwaysCooperate(),
-        AlwaysDefect()
-    ]
-
-    tournament = Tournament(bots, noise_rate=0.03)
+    # Bots are discovered in bots/ and imported on first use
+    registry = BotRegistry("bots", package="bots", cache_path="./data/bot_registry.json")
+
+    tournament = Tournament(noise_rate=0.03, registry=registry)
     history = tournament.run_evolution(
         generations=20,
         survival_rate=0.80,
@@ -33,15 +20,7 @@ def main():
     tournament.export_results()
 
     # Plot evolution
-    all_bots = [
-        "TitForTat",
-        "GenerousTitForTat",
-        "PavlovBot",
-        "AdaptiveRandom",
-        "RandomBot",
-        "AlwaysCooperate",
-        "AlwaysDefect"
-    ]
+    all_bots = list(registry)
 
     result = plot_bar_race(history, all_bots, interval=1000, frames_per_gen=5)
     ani = result[0]
@@ -0,0 +1,159 @@
+"""
+Localhost checks for core.distributed. Run from the repository root with
+``python -m unittest tests.test_distributed`` (or ``python -m pytest tests``).
+"""
+import multiprocessing
+import os
+import subprocess
+import sys
+import tempfile
+import time
+import unittest
+
+from multiprocessing.connection import Client
+
+from core.distributed import Coordinator, ShardedTournament
+from core.registry import BotRegistry
+from core.tournament import Tournament
+from bots.tit_for_tat import TitForTat
+from bots.pavlov_bot import PavlovBot
+from bots.always_cooperate import AlwaysCooperate
+from bots.always_defect import AlwaysDefect
+from bots.generous_tit_for_tat import GenerousTitForTat
+from bots.random_bot import RandomBot
+
+
+def double(item):
+    return item * 2
+
+
+def die_once(item):
+    """Kill the worker process on value 3 unless `marker` exists; otherwise double."""
+    marker, value = item
+    if value == 3 and not os.path.exists(marker):
+        open(marker, "w").close()
+        os._exit(1)
+    return value * 2
+
+
+def hang_once(item):
+    """Stall past the shard timeout on value 3 unless `marker` exists; otherwise double."""
+    marker, value = item
+    if value == 3 and not os.path.exists(marker):
+        open(marker, "w").close()
+        time.sleep(3)
+    return value * 2
+
+
+def first(item):
+    if item == "boom":
+        raise ValueError("boom")
+    time.sleep(0.2)
+    return ("first", item)
+
+
+def second(item):
+    return ("second", item)
+
+
+def deterministic_bots():
+    return [TitForTat(), PavlovBot(), AlwaysCooperate(), AlwaysDefect()] * 2
+
+
+def noisy_bots():
+    return [TitForTat(), GenerousTitForTat(), PavlovBot(), RandomBot()] * 2
+
+
+class CoordinatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = Coordinator(shard_timeout=1.0)
+        self.coordinator.spawn_workers(3)
+        self.tmp = tempfile.TemporaryDirectory()
+
+    def tearDown(self):
+        self.coordinator.close()
+        self.tmp.cleanup()
+
+    def test_results_keep_input_order(self):
+        items = list(range(50))
+        self.assertEqual(self.coordinator.map(double, items, shard_size=4), [i * 2 for i in items])
+
+    def test_killed_worker_shard_is_requeued(self):
+        marker = os.path.join(self.tmp.name, "died")
+        items = [(marker, i) for i in range(10)]
+        self.assertEqual(self.coordinator.map(die_once, items, shard_size=2), [i * 2 for i in range(10)])
+        self.assertTrue(os.path.exists(marker))
+        self.assertEqual(len(self.coordinator.workers), 2)
+
+    def test_hung_worker_shard_is_requeued(self):
+        marker = os.path.join(self.tmp.name, "hung")
+        items = [(marker, i) for i in range(10)]
+        self.assertEqual(self.coordinator.map(hang_once, items, shard_size=2), [i * 2 for i in range(10)])
+        self.assertTrue(os.path.exists(marker))
+
+    def test_each_coordinator_has_its_own_key(self):
+        with Coordinator() as other:
+            self.assertNotEqual(other.authkey, self.coordinator.authkey)
+        with self.assertRaises(multiprocessing.AuthenticationError):
+            Client(self.coordinator.address, authkey=b"pd-tournament")
+
+    def test_cli_worker_needs_the_key(self):
+        env = {k: v for k, v in os.environ.items() if k != "PD_AUTHKEY"}
+        with Coordinator() as coordinator:
+            worker = [sys.executable, "-m", "core.distributed", "--connect", "%s:%d" % coordinator.address]
+            self.assertNotEqual(subprocess.run(worker, env=env, capture_output=True).returncode, 0)
+            process = subprocess.Popen(worker + ["--authkey", coordinator.authkey.hex()], env=env)
+            # A builtin, since this test module is not importable from a separate process
+            self.assertEqual(coordinator.map(abs, range(-10, 10), shard_size=2), [abs(i) for i in range(-10, 10)])
+        self.assertEqual(process.wait(10), 0)
+
+    def test_failed_map_does_not_leak_into_next(self):
+        with self.assertRaises(RuntimeError):
+            self.coordinator.map(first, ["boom", 1, 2], shard_size=1)
+        items = [10, 11, 12, 13]
+        self.assertEqual(self.coordinator.map(second, items, shard_size=1), [("second", i) for i in items])
+
+
+class ShardedTournamentTest(unittest.TestCase):
+
+    def setUp(self):
+        self.coordinator = Coordinator()
+        self.coordinator.spawn_workers(3)
+
+    def tearDown(self):
+        self.coordinator.close()
+
+    def test_matches_local_run(self):
+        local = Tournament(deterministic_bots(), noise_rate=0)
+        sharded = ShardedTournament(deterministic_bots(), self.coordinator, noise_rate=0, shard_size=3)
+        for generation in (1, 2):
+            self.assertEqual(sharded.run(100, generation), local.run(100, generation))
+            self.assertEqual(list(sharded.results.items()), list(local.results.items()))
+        self.assertEqual(sharded.match_history, local.match_history)
+
+    def test_seeded_run_independent_of_shard_size(self):
+        runs = []
+        for shard_size in (1, 4, 100):
+            tournament = ShardedTournament(noisy_bots(), self.coordinator, shard_size=shard_size, seed=7)
+            stats = tournament.run(100)
+            runs.append((stats, tournament.results, tournament.match_history))
+        self.assertEqual(runs[0], runs[1])
+        self.assertEqual(runs[0], runs[2])
+
+    def test_registry_tables_reach_workers(self):
+        registry = BotRegistry("bots", package="bots")
+        bots = registry.create(["TitForTat", "PavlovBot", "AlwaysCooperate", "RandomBot"])
+        compiled = ShardedTournament(bots, self.coordinator, seed=3, registry=registry)
+        tables = compiled._tables_for(bots[0], bots[1])
+        self.assertIs(tables[type(bots[0])], registry.compiled[type(bots[0])])
+        self.assertIsNone(compiled._tables_for(bots[0], bots[3]))
+
+        plain = ShardedTournament(registry.create(["TitForTat", "PavlovBot", "AlwaysCooperate", "RandomBot"]),
+                                  self.coordinator, seed=3)
+        self.assertEqual(compiled.run(200), plain.run(200))
+        self.assertEqual(compiled.match_history, plain.match_history)
+
+
+if __name__ == "__main__":
+    unittest.main()
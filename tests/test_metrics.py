@@ -0,0 +1,134 @@
+"""
+Checks for core.metrics and its hooks in the engine and tournament. Run from
+the repository root with ``python -m unittest tests.test_metrics``.
+"""
+import random
+import threading
+import unittest
+import urllib.request
+
+from core.distributed import Coordinator, ShardedTournament
+from core.game_engine import GameEngine
+from core.metrics import MetricsRecorder
+from core.registry import BotRegistry
+from core.tournament import Tournament
+from bots.tit_for_tat import TitForTat
+from bots.pavlov_bot import PavlovBot
+from bots.random_bot import RandomBot
+from bots.always_cooperate import AlwaysCooperate
+
+
+def gauge(snapshot, name):
+    """Return the value of metric `name` in a text snapshot."""
+    for line in snapshot.splitlines():
+        if line.startswith(name + " "):
+            return float(line.split()[1])
+    raise KeyError(name)
+
+
+def bots():
+    return [TitForTat(), PavlovBot(), RandomBot(), AlwaysCooperate()]
+
+
+class MetricsRecorderTest(unittest.TestCase):
+
+    def setUp(self):
+        self.metrics = MetricsRecorder(path=None, interval=None)
+
+    def tearDown(self):
+        self.metrics.close()
+
+    def test_engine_counts_plain_and_compiled_matches(self):
+        registry = BotRegistry("bots", package="bots")
+        engine = GameEngine(metrics=self.metrics, compiled=registry.compiled)
+        tit_for_tat, pavlov, random_bot = registry.create(["TitForTat", "PavlovBot", "RandomBot"])
+        self.assertIn(TitForTat, registry.compiled)
+        engine.play_match(tit_for_tat, pavlov, 100)  # compiled path
+        engine.play_match(tit_for_tat, random_bot, 50)  # per-round path
+        self.assertEqual((self.metrics.matches, self.metrics.rounds), (2, 150))
+
+    def test_throughput_window_resets_on_emit(self):
+        for _ in range(10):
+            self.metrics.record_match(100)
+        self.assertGreater(gauge(self.metrics.render(), "pd_rounds_per_second"), 0)
+        self.metrics.emit()
+        snapshot = self.metrics.render()
+        self.assertEqual(gauge(snapshot, "pd_matches_per_second"), 0)
+        self.assertEqual(gauge(snapshot, "pd_matches_total"), 10)
+
+    def test_start_run_resets_counters(self):
+        self.metrics.record_match(100)
+        self.metrics.start_run(5)
+        snapshot = self.metrics.render()
+        self.assertEqual(gauge(snapshot, "pd_matches_total"), 0)
+        self.assertEqual(gauge(snapshot, "pd_rounds_total"), 0)
+
+    def test_tournament_run_reports_generation(self):
+        Tournament(bots(), metrics=self.metrics).run(rounds_per_match=20, generation=3)
+        snapshot = self.metrics.render()
+        self.assertEqual(gauge(snapshot, "pd_generation"), 3)
+        self.assertEqual(gauge(snapshot, "pd_matches_total"), 6)
+        self.assertIn("pd_generation_seconds ", snapshot)
+        self.assertEqual(gauge(snapshot, 'pd_population{bot="TitForTat"}'), 1)
+
+    def test_http_endpoint_on_free_port(self):
+        server = MetricsRecorder(path=None, interval=None, port=0)
+        try:
+            server.record_match(7)
+            server.emit()
+            with urllib.request.urlopen(f"http://127.0.0.1:{server.port}/metrics") as response:
+                body = response.read().decode()
+            self.assertEqual(gauge(body, "pd_rounds_total"), 7)
+        finally:
+            server.close()
+
+    def test_no_thread_without_interval(self):
+        before = threading.active_count()
+        recorder = MetricsRecorder(path=None, interval=None)
+        self.assertIsNone(recorder._ticker)
+        self.assertEqual(threading.active_count(), before)
+        recorder.close()
+
+    def test_disabled_metrics_do_not_change_results(self):
+        runs = []
+        for metrics in (None, self.metrics):
+            random.seed(11)
+            tournament = Tournament(bots(), metrics=metrics)
+            runs.append((tournament.run(50), tournament.match_history))
+        self.assertEqual(runs[0], runs[1])
+
+
+class ShardedProgressTest(unittest.TestCase):
+
+    def test_matches_counted_while_shards_arrive(self):
+        metrics = MetricsRecorder(path=None, interval=None)
+        in_map = []  # whether each record_match happened before map() returned
+        state = {"mapping": False}
+        record_match = metrics.record_match
+        metrics.record_match = lambda rounds: (in_map.append(state["mapping"]), record_match(rounds))
+
+        with Coordinator() as coordinator:
+            coordinator.spawn_workers(2)
+            shards = []
+            self.assertEqual(coordinator.map(abs, range(-5, 5), shard_size=3, progress=shards.append),
+                             [abs(i) for i in range(-5, 5)])
+            self.assertEqual(sorted(len(shard) for shard in shards), [1, 3, 3, 3])
+
+            coordinator_map = coordinator.map
+
+            def tracked_map(*args, **kwargs):
+                state["mapping"] = True
+                try:
+                    return coordinator_map(*args, **kwargs)
+                finally:
+                    state["mapping"] = False
+
+            coordinator.map = tracked_map
+            ShardedTournament(bots() * 2, coordinator, metrics=metrics, shard_size=4).run(20)
+        self.assertEqual(metrics.matches, 28)
+        self.assertEqual(in_map, [True] * 28)
+        metrics.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
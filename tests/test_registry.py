@@ -0,0 +1,122 @@
+"""
+Checks for core.registry and the compiled-table engine path. Run from the
+repository root with ``python -m unittest tests.test_registry``.
+"""
+import json
+import os
+import random
+import sys
+import tempfile
+import unittest
+
+from core.game_engine import GameEngine
+from core.registry import BotRegistry, analyze_bot
+from core.tournament import Tournament
+from bots.base import BaseBot, Move
+from bots.always_cooperate import AlwaysCooperate
+
+
+class LateDefector(BaseBot):
+    """Cooperates, then defects from round 400 on."""
+
+    def get_move(self, state):
+        return Move.DEFECT if state.round_number >= 400 else Move.COOPERATE
+
+
+class BotRegistryTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.cache_path = os.path.join(self.tmp.name, "registry.json")
+        self.registry = BotRegistry("bots", package="bots", cache_path=self.cache_path)
+
+    def tearDown(self):
+        self.tmp.cleanup()
+
+    def test_discovery_is_lazy(self):
+        self.assertIn("TitForTat", self.registry)
+        self.assertNotIn("BaseBot", self.registry)
+        self.assertEqual(self.registry.classes, {})
+
+    def test_metadata(self):
+        self.assertEqual(self.registry.metadata("TitForTat"), {"deterministic": True, "memory_depth": 1})
+        self.assertEqual(self.registry.metadata("RandomBot"), {"deterministic": False, "memory_depth": None})
+
+    def test_compiled_match_equals_plain_match(self):
+        plain = GameEngine()
+        compiled = GameEngine(compiled=self.registry.compiled)
+        for name_a, name_b in [("TitForTat", "PavlovBot"), ("AlwaysDefect", "PavlovBot")]:
+            outcomes = []
+            for engine in (plain, compiled):
+                bot_a, bot_b = self.registry.create([name_a, name_b])
+                random.seed(3)
+                scores = engine.play_match(bot_a, bot_b, 300)
+                outcomes.append((scores, bot_a.self_history, bot_a.opponent_history,
+                                 bot_b.self_history, bot_b.opponent_history,
+                                 bot_a.last_coop_rate, bot_b.last_coop_rate))
+            self.assertEqual(outcomes[0], outcomes[1])
+            self.assertEqual(len(outcomes[1][1]), 300)
+
+    def test_round_dependent_bot_is_not_compiled(self):
+        metadata, strategy = analyze_bot(LateDefector, horizon=500)
+        self.assertIsNone(strategy)
+        self.assertIsNone(metadata["memory_depth"])
+
+    def test_table_not_used_past_its_horizon(self):
+        _, late = analyze_bot(LateDefector, horizon=300)
+        _, cooperate = analyze_bot(AlwaysCooperate, horizon=300)
+        self.assertEqual(late.horizon, 300)
+        engine = GameEngine(noise_rate=0, compiled={LateDefector: late, AlwaysCooperate: cooperate})
+        self.assertEqual(engine.play_match(LateDefector(), AlwaysCooperate(), 500), (1700, 1200))
+
+    def test_cache_invalidated_by_max_depth(self):
+        self.registry.metadata("TitForTat")
+        with open(self.cache_path) as f:
+            self.assertIn("TitForTat", json.load(f))
+        deeper = BotRegistry("bots", package="bots", cache_path=self.cache_path, max_depth=2)
+        self.assertIsNone(deeper._cache_entry("TitForTat"))
+        same = BotRegistry("bots", package="bots", cache_path=self.cache_path)
+        self.assertIsNotNone(same._cache_entry("TitForTat"))
+
+    def test_subclass_in_another_file_is_discovered(self):
+        subs = os.path.join(self.tmp.name, "pd_test_subs")
+        os.mkdir(subs)
+        with open(os.path.join(subs, "a_grim.py"), "w") as f:
+            f.write("from bots.base import BaseBot, Move\n\n"
+                    "class Grim(BaseBot):\n"
+                    "    def get_move(self, state):\n"
+                    "        return Move.DEFECT if Move.DEFECT in state.opponent_history else Move.COOPERATE\n")
+        with open(os.path.join(subs, "b_grimmer.py"), "w") as f:
+            f.write("from pd_test_subs.a_grim import Grim\n\n"
+                    "class Grimmer(Grim):\n"
+                    "    pass\n")
+        sys.path.insert(0, self.tmp.name)
+        try:
+            registry = BotRegistry(subs, package="pd_test_subs")
+            self.assertEqual(sorted(registry), ["Grim", "Grimmer"])
+            grimmer = registry["Grimmer"]
+            self.assertIs(grimmer.__mro__[1], registry["Grim"])
+        finally:
+            sys.path.remove(self.tmp.name)
+            for name in [m for m in sys.modules if m.split(".")[0] == "pd_test_subs"]:
+                del sys.modules[name]
+
+    def test_tournament_uses_registry(self):
+        tournament = Tournament(registry=self.registry)
+        self.assertIs(tournament.bot_class_map, self.registry)
+        self.assertEqual(len(tournament.bots), len(self.registry))
+        with self.assertRaises(ValueError):
+            Tournament()
+
+    def test_tournament_with_bots_and_registry_keeps_its_bots(self):
+        bots = self.registry.create(["TitForTat", "PavlovBot", "AlwaysCooperate"])
+        tournament = Tournament(bots, noise_rate=0, registry=self.registry)
+        self.assertEqual(sorted(tournament.bot_class_map), ["AlwaysCooperate", "PavlovBot", "TitForTat"])
+        self.assertIs(tournament.engine.compiled, self.registry.compiled)
+        tournament.run_evolution(generations=2, rounds_per_match=50)
+        played = {row["Bot A"] for row in tournament.match_history} | {row["Bot B"] for row in tournament.match_history}
+        self.assertEqual(played, {"AlwaysCooperate", "PavlovBot", "TitForTat"})
+
+
+if __name__ == "__main__":
+    unittest.main()